@@ -103,8 +103,8 @@ class GridIO:
 
             # length of grd data
             _nt = self.ni * self.nj * self.nk * 3
-            # read the grd data from file to temp_array
-            _temp = np.fromfile(grid, dtype=data_type, count=sum(_nt))
+            # map the grd data instead of reading it into a temp array; blocks are paged in as they are copied
+            _temp = np.memmap(self.filename, dtype=data_type, mode='r', offset=4 * (1 + 3 * self.nb), shape=sum(_nt))
 
             # pre-define grd to reduce calling pad and concatenate
             self.grd = np.zeros((self.ni.max(), self.nj.max(), self.nk.max(), 3, self.nb))
@@ -114,6 +114,8 @@ class GridIO:
                 self.grd[0:self.ni[_i], 0:self.nj[_i], 0:self.nk[_i], 0:3, _i] = \
                     _temp[sum(_nt[0:_i]):sum(_nt[0:_i]) + _nt[_i]] \
                     .reshape((self.ni[_i], self.nj[_i], self.nk[_i], 3), order='F')
+            # grd holds a copy of the data; close the file mapping
+            del _temp
 
             print("Grid data reading is successful for " + self.filename + "\n")
 
@@ -399,33 +401,26 @@ class FlowIO:
             _temp = np.fromfile(data, dtype='i4', count=3 * self.nb)
             self.ni, self.nj, self.nk = _temp[0::3], _temp[1::3], _temp[2::3]
 
-            # Read-in flow data into a temp array
-            # Less use of fromfile is more speed
+            # Map the flow data instead of reading it into a temp array; blocks are paged in as they are copied
+            # Each block is preceded by its four dimensionless quantities
             _nt = self.ni * self.nj * self.nk * 5
-            _temp = np.fromfile(data, dtype=data_type, count=sum(_nt) + 4 * self.nb)
+            _temp = np.memmap(self.filename, dtype=data_type, mode='r', offset=4 * (1 + 3 * self.nb),
+                              shape=sum(_nt) + 4 * self.nb)
 
             # Assign the dimensionless attributes
             self.mach, self.alpha, self.rey, self.time = _temp[0:4]
 
-            # Create a mask to remove dimensionless quantities from q
-            # Indices of the first four dimensionless quantities
-            _index_array = np.array([0, 1, 2, 3])
-            for i in range(len(_nt) - 1):
-                _term = sum(_temp[0:i]) + (i + 1) * 4
-                _index_array = np.concatenate((_index_array, np.arange(_term, _term + 4)))
-            _mask = np.ones(len(_temp), dtype='bool')
-            _mask[_index_array] = 0
-            # Use the mask to remove dimensionless quantities
-            _temp = _temp[_mask]
-
             # Pre-define q array
             self.q = np.zeros((self.ni.max(), self.nj.max(), self.nk.max(), 5, self.nb))
 
             # Reshape and assign data to q
             for _i in range(self.nb):
+                _start = sum(_nt[0:_i]) + 4 * (_i + 1)
                 self.q[0:self.ni[_i], 0:self.nj[_i], 0:self.nk[_i], 0:5, _i] = \
-                    _temp[sum(_nt[0:_i]):sum(_nt[0:_i]) + _nt[_i]] \
+                    _temp[_start:_start + _nt[_i]] \
                     .reshape((self.ni[_i], self.nj[_i], self.nk[_i], 5), order='F')
+            # q holds a copy of the data; close the file mapping
+            del _temp
 
             print("Flow data reading is successful for " + self.filename + "\n")
 
@@ -500,25 +495,24 @@ class FlowIO:
         """
         try:
             # load the flow file if available
-            self.q = np.load(self.filename + '_temp/flow_data.npy')
+            # memory-mapped; only the nodes touched by the search and interpolation are read from disk
+            # copy-on-write, so q stays writable like a loaded array; changes are kept in memory, not in the file
+            self.q = np.load(self.filename + '_temp/flow_data.npy', mmap_mode='c')
             print('**IMPORTANT** Read data from existing temp flow_data.npy file.\n')
         except:
+            # Read the formatted data till the file ends; the text is parsed only once
+            print('Starting flow read from the formatted text. Please wait...\n')
+            with open(self.filename, 'r') as flow:
+                _data = np.fromfile(flow, sep=' ', dtype=data_type, count=-1)
             try:
-                # Read the formatted data till the file ends and reshape it to (ni, nj, nk, 5, nb)
-                print('Starting flow read from the formatted text. Please wait...\n')
-                with open(self.filename, 'r') as flow:
-                    self.q = np.fromfile(flow, sep=' ', dtype=data_type, count=-1)\
-                        .reshape((int(grid.nk), int(grid.nj), int(grid.ni), 5, 1)).transpose(2, 1, 0, 3, 4)
-                print('Flow data reading is successful for ' + self.filename + '\n')
+                # reshape it to (ni, nj, nk, 5, nb)
+                self.q = _data.reshape((int(grid.nk), int(grid.nj), int(grid.ni), 5, 1)).transpose(2, 1, 0, 3, 4)
             except ValueError:
                 # check for 2D formatted data
-                # read the formatted data till the file ends and reshape it to (ni, nj, 1, 5, nb)
-                # and expand it to (ni, nj, nk, 5, nb)
-                with open(self.filename, 'r') as flow:
-                    self.q = np.fromfile(flow, sep=' ', dtype=data_type, count=-1)\
-                        .reshape((1, int(grid.nj), int(grid.ni), 5, 1)).transpose(2, 1, 0, 3, 4)
+                # reshape it to (ni, nj, 1, 5, nb) and expand it to (ni, nj, nk, 5, nb)
+                self.q = _data.reshape((1, int(grid.nj), int(grid.ni), 5, 1)).transpose(2, 1, 0, 3, 4)
                 self.q = self.q.repeat(int(grid.nk), axis=2)
-                print('Flow data reading is successful for ' + self.filename + '\n')
+            print('Flow data reading is successful for ' + self.filename + '\n')
 
 
             # Save as numpy file for future computations
@@ -1,5 +1,6 @@
 # Use tri-linear interpolation to get data at the given point
 
+from types import SimpleNamespace
 import numpy as np
 from .variables import Variables
 
@@ -71,32 +72,82 @@ class Interpolation:
                                                            "to compute properties at " + self.idx.ppoint + "\n"
         return doc
 
-    @staticmethod
     def _shock_cell_check(self):
         # Inspect shock cell and assign nearest interpolation
         i0, j0, k0 = self.idx.cell[0, 0], self.idx.cell[0, 1], self.idx.cell[0, 2]
         i1, j1, k1 = self.idx.cell[1, 0], self.idx.cell[1, 1], self.idx.cell[1, 2]
-        # compute velocity, mach
-        _var = Variables(self.flow)
+        # compute velocity, mach only at the two nodes; q of shape (2, 5, 1)
+        _var = Variables(SimpleNamespace(q=self.flow.q[[i0, i1], [j0, j1], [k0, k1], :, self.idx.block][..., None]))
         _var.compute_mach()
         # _grad_v = _J_inv * (v1 - v0)
-        _grad_v = self.idx.grid.m2[i0, j0, k0, :, self.idx.block] * (
-                _var.velocity[i1, j1, k1, :, self.idx.block]
-                - _var.velocity[i0, j0, k0, :, self.idx.block]
-        )
+        _grad_v = self.idx.grid.m2[i0, j0, k0, :, self.idx.block] * (_var.velocity[1, :, 0] - _var.velocity[0, :, 0])
         # compute norm to get the unit vector
         _grad_v = _grad_v / np.linalg.norm(_grad_v)
         # mach vector -- mach * unit velocity vector
-        _mach0 = (_var.mach[i0, j0, k0] * _var.velocity[i0, j0, k0, :, self.idx.block]
-                  / _var.velocity_magnitude[i0, j0, k0, self.idx.block])
-        _mach1 = (_var.mach[i1, j1, k1] * _var.velocity[i1, j1, k1, :, self.idx.block]
-                  / _var.velocity_magnitude[i1, j1, k1, self.idx.block])
+        _mach0 = _var.mach[0] * _var.velocity[0, :, 0] / _var.velocity_magnitude[0, 0]
+        _mach1 = _var.mach[1] * _var.velocity[1, :, 0] / _var.velocity_magnitude[1, 0]
         # normal mach vector
         _mach_n0 = np.linalg.norm(np.dot(_mach0, _grad_v))
         _mach_n1 = np.linalg.norm(np.dot(_mach1, _grad_v))
 
         return _mach_n0, _mach_n1
 
+    def compute_batch(self):
+        """
+        Vectorized p-space tri-linear interpolation for an array of points
+        Needs a Search object computed with compute_batch
+        Same edge, face and cell interpolation in physical co-ordinates as compute(method='p-space')
+
+        Returns:
+            q --> Attribute with the interpolated flow data of shape (n, 5, 1)
+            Points not found by the search have nan data
+
+        """
+        self.method = 'p-space'
+
+        # Assign data from q file to keep the format for further computations
+        self.nb = self.flow.nb
+        self.ni, self.nj, self.nk = self.flow.ni, self.flow.nj, self.flow.nk
+        self.mach, self.alpha, self.rey, self.time = self.flow.mach, self.flow.alpha, self.flow.rey, self.flow.time
+
+        _found = self.idx.block >= 0
+        _b = self.idx.block[_found]
+        _n = np.stack((self.flow.ni[_b], self.flow.nj[_b], self.flow.nk[_b]), axis=1)
+        _i, _j, _k, _ = self.idx._batch_cell(self.idx.cpoint[_found], _n)
+        _ppoint = self.idx.ppoint[_found]
+
+        # Grid and flow data at the cell nodes; (n, 8, 3) and (n, 8, 5)
+        _cell_grd = self.idx.grid.grd[_i, _j, _k, :, _b[:, None]]
+        _cell_q = self.flow.q[_i, _j, _k, :, _b[:, None]]
+
+        def _f(_axis, _grd1, _grd2, _data1, _data2):
+            # Linear interpolation b/w two sets of points to the given point's x, y or z
+            _a = (_grd2[:, _axis] - _ppoint[:, _axis]) / (_grd2[:, _axis] - _grd1[:, _axis])
+            _b = (_ppoint[:, _axis] - _grd1[:, _axis]) / (_grd2[:, _axis] - _grd1[:, _axis])
+            return _a[:, None] * _data1 + _b[:, None] * _data2
+
+        # Along x on the edges of the 0123 and 4567 faces
+        _cell_grd_01 = _f(0, _cell_grd[:, 0], _cell_grd[:, 1], _cell_grd[:, 0], _cell_grd[:, 1])
+        _cell_grd_32 = _f(0, _cell_grd[:, 3], _cell_grd[:, 2], _cell_grd[:, 3], _cell_grd[:, 2])
+        _cell_q_01 = _f(0, _cell_grd[:, 0], _cell_grd[:, 1], _cell_q[:, 0], _cell_q[:, 1])
+        _cell_q_32 = _f(0, _cell_grd[:, 3], _cell_grd[:, 2], _cell_q[:, 3], _cell_q[:, 2])
+        _cell_grd_45 = _f(0, _cell_grd[:, 4], _cell_grd[:, 5], _cell_grd[:, 4], _cell_grd[:, 5])
+        _cell_grd_76 = _f(0, _cell_grd[:, 7], _cell_grd[:, 6], _cell_grd[:, 7], _cell_grd[:, 6])
+        _cell_q_45 = _f(0, _cell_grd[:, 4], _cell_grd[:, 5], _cell_q[:, 4], _cell_q[:, 5])
+        _cell_q_76 = _f(0, _cell_grd[:, 7], _cell_grd[:, 6], _cell_q[:, 7], _cell_q[:, 6])
+
+        # Along y to the point projection on the faces
+        _cell_grd_0123 = _f(1, _cell_grd_01, _cell_grd_32, _cell_grd_01, _cell_grd_32)
+        _cell_q_0123 = _f(1, _cell_grd_01, _cell_grd_32, _cell_q_01, _cell_q_32)
+        _cell_grd_4567 = _f(1, _cell_grd_45, _cell_grd_76, _cell_grd_45, _cell_grd_76)
+        _cell_q_4567 = _f(1, _cell_grd_45, _cell_grd_76, _cell_q_45, _cell_q_76)
+
+        # Along z to the given point based on the face points
+        self.q = np.full((len(_found), 5, 1), np.nan)
+        self.q[_found, :, 0] = _f(2, _cell_grd_0123, _cell_grd_4567, _cell_q_0123, _cell_q_4567)
+
+        return
+
     def compute(self, method='p-space'):
         """
         Find interpolated plot3d data and grid metrics at a given point
@@ -213,7 +264,7 @@ class Interpolation:
                     # Do the shock cell check
                     if self.idx.cell.shape == (8, 3) and self.idx.info is None:
                         if self.adaptive == 'shock':
-                            _mach_n0, _mach_n1 = self._shock_cell_check(self)
+                            _mach_n0, _mach_n1 = self._shock_cell_check()
                             # if shock is in the cell _mach_n0 > 1 > _mach_n1
                             if _mach_n0 > 1 > _mach_n1:
                                 _distance = np.sqrt(np.sum((_cell_grd - self.idx.ppoint) ** 2, axis=1))
@@ -262,7 +313,7 @@ class Interpolation:
                 # Do the shock cell check
                 if self.idx.cell.shape == (8, 3) and self.idx.info is None:
                     if self.adaptive == "shock":
-                        _mach_n0, _mach_n1 = self._shock_cell_check(self)
+                        _mach_n0, _mach_n1 = self._shock_cell_check()
                         # if shock is in the cell _mach_n0 > 1 > _mach_n1
                         if _mach_n0 > 1 > _mach_n1:
                             _distance = np.sqrt(np.sum((self.idx.cell - self.idx.cpoint) ** 2, axis=1))
@@ -565,7 +616,7 @@ class Interpolation:
                 _shape = np.array([len(_x), len(_y), len(_z)])
 
                 if self.adaptive =='shock':
-                    _mach_n0, _mach_n1 = self._shock_cell_check(self)
+                    _mach_n0, _mach_n1 = self._shock_cell_check()
                     # if shock is in the cell _mach_n0 > 1 > _mach_n1
                     if _mach_n0 > 1 > _mach_n1:
                         _method = 'nearest'
@@ -698,7 +749,7 @@ class Interpolation:
                 _shape = np.array([len(_x), len(_y), len(_z)])
 
                 if self.adaptive =='shock':
-                    _mach_n0, _mach_n1 = self._shock_cell_check(self)
+                    _mach_n0, _mach_n1 = self._shock_cell_check()
                     # if shock is in the cell _mach_n0 > 1 > _mach_n1
                     if _mach_n0 > 1 > _mach_n1:
                         _method = 'nearest'
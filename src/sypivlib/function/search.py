@@ -73,7 +73,6 @@ class Search:
                           [_i, _j + 1, _k + 1]], dtype=int)
         return _cell
 
-    @staticmethod
     def _cell_index(self, i, j, k):
         # _Internal method to obtain the nodes of the cell in which the given point is present
 
@@ -122,7 +121,6 @@ class Search:
 
         return
 
-    @staticmethod
     def _find_block(self):
         # _Internal method to find the block
         # Setup to compute block number in which the point is present
@@ -160,7 +158,7 @@ class Search:
         """
 
         # Find the block number
-        self.block = self._find_block(self)
+        self.block = self._find_block()
         # To check for point out-of-domain case
         if self.block is None:
             return
@@ -176,7 +174,7 @@ class Search:
                 # Find the closest node to the point --> index.ndim = 4
                 self.index = np.array(np.unravel_index(_dist.argmin(), _dist.shape))
                 i, j, k, self.block = self.index[0], self.index[1], self.index[2], self.index[3]
-                self._cell_index(self, i, j, k)
+                self._cell_index(i, j, k)
                 # Check for the end of the domain case
                 if max(self.cell[:, 0]) > self.grid.ni[self.block] - 1 or \
                         max(self.cell[:, 1]) > self.grid.nj[self.block] - 1 or \
@@ -199,7 +197,7 @@ class Search:
 
                 self.index = np.array(np.unravel_index(_dist.argmin(), _dist.shape))
                 i, j, k = self.index
-                self._cell_index(self, i, j, k)
+                self._cell_index(i, j, k)
                 # Check for the end of the domain case
                 if max(self.cell[:, 0]) > self.grid.ni[self.block] - 1 or \
                         max(self.cell[:, 1]) > self.grid.nj[self.block] - 1 or \
@@ -225,6 +223,91 @@ class Search:
                 # This is only performed once to get the initial c-space point
                 self.cpoint = self.p2c(self.ppoint)
 
+    @staticmethod
+    def _batch_cell(_cpoint, _n):
+        # _Internal method to get the cell nodes and tri-linear weights for an array of c-space points
+        # _cpoint, _n are of shape (n, 3); returns i, j, k node indices and weights of shape (n, 8)
+        _eps = np.minimum(np.floor(_cpoint).astype(int), _n - 2)
+        _alpha, _beta, _gamma = (_cpoint - _eps).T
+        _i = _eps[:, 0, None] + np.array([0, 1, 1, 0, 0, 1, 1, 0])
+        _j = _eps[:, 1, None] + np.array([0, 0, 1, 1, 0, 0, 1, 1])
+        _k = _eps[:, 2, None] + np.array([0, 0, 0, 0, 1, 1, 1, 1])
+        _weights = np.stack(((1 - _alpha) * (1 - _beta) * (1 - _gamma),
+                             _alpha * (1 - _beta) * (1 - _gamma),
+                             _alpha * _beta * (1 - _gamma),
+                             (1 - _alpha) * _beta * (1 - _gamma),
+                             (1 - _alpha) * (1 - _beta) * _gamma,
+                             _alpha * (1 - _beta) * _gamma,
+                             _alpha * _beta * _gamma,
+                             (1 - _alpha) * _beta * _gamma), axis=1)
+        return _i, _j, _k, _weights
+
+    def compute_batch(self, max_iter=1000):
+        """
+        Vectorized p-space search for an array of points
+        ppoint is of shape (n, 3); Newton-Raphson is run on all the points at once
+
+        parameter:
+            max_iter: int
+                Maximum number of Newton-Raphson iterations
+
+        return:
+        None
+            cpoint --> (n, 3) c-space co-ordinates
+            block --> (n,) block of each point
+            Points out of domain or not converged have nan in ppoint and cpoint and -1 in block
+
+        author: Dilip Kalagotla @ kal ~ dilip.kalagotla@gmail.com
+        """
+        _ppoint = np.asarray(self.ppoint, dtype=np.float64).reshape(-1, 3)
+
+        # Find the block of each point
+        _bool = (self.grid.grd_min[None, ...] <= _ppoint[:, None, :]) & \
+                (self.grid.grd_max[None, ...] >= _ppoint[:, None, :])
+        _bool = _bool.all(axis=2)
+        _found = _bool.any(axis=1)
+        self.block = np.where(_found, _bool.argmax(axis=1), -1)
+
+        # Newton-Raphson on all points in the domain; initial guess is the center of the block
+        _b = np.maximum(self.block, 0)
+        _n = np.stack((self.grid.ni[_b], self.grid.nj[_b], self.grid.nk[_b]), axis=1)
+        _cpoint = (_n - 1) / 2
+        _active = np.nonzero(_found)[0]
+        _converged = np.zeros(len(_ppoint), dtype=bool)
+
+        for _iter in range(max_iter):
+            if len(_active) == 0:
+                break
+            _c, _na, _ba = _cpoint[_active], _n[_active], _b[_active]
+
+            # Reset points outside the block into the domain
+            _c = np.where(np.floor(_c) + 1 >= _na, _na - 1 - np.modf(_c)[0], _c)
+            _i, _j, _k, _w = self._batch_cell(_c, _na)
+
+            # Transform from c to p-space and interpolate J_inv using tri-linear interpolation
+            _pred_ppoint = np.einsum('nc,ncd->nd', _w, self.grid.grd[_i, _j, _k, :, _ba[:, None]])
+            _J_inv = np.einsum('nc,ncde->nde', _w, self.grid.m2[_i, _j, _k, :, :, _ba[:, None]])
+
+            # Difference b/w predicted point to given point
+            _delta_ppoint = _ppoint[_active] - _pred_ppoint
+            _tol = np.maximum(1e-12 * self.grid.J[_i[:, 0], _j[:, 0], _k[:, 0], _ba], 1e-12)
+            _done = np.abs(_delta_ppoint).sum(axis=1) <= _tol
+            _cpoint[_active] = _c
+            _converged[_active[_done]] = True
+
+            # Transform from p to c-space and update points
+            _c = _c + np.einsum('nde,ne->nd', _J_inv, _delta_ppoint)
+            _c[_c < 0] = 0
+            _cpoint[_active[~_done]] = _c[~_done]
+            _active = _active[~_done]
+
+        _cpoint[~_converged] = np.nan
+        self.block[~_converged] = -1
+        self.cpoint = _cpoint
+        self.ppoint = np.where(_converged[:, None], _ppoint, np.nan)
+
+        return
+
     def c2p(self, _cpoint):
         """
         Method to convert c-space point to p-space
@@ -281,7 +364,7 @@ class Search:
         self.ppoint = _ppoint
 
         if self.block is None:
-            self.block = self._find_block(self)
+            self.block = self._find_block()
 
         # Start Newton-Raphson
         _iter = 0
@@ -340,7 +423,7 @@ class Search:
             if sum(abs(_delta_ppoint)) <= _tol:
                 _eps0, _eps1, _eps2 = _cpoint.astype(int)
                 # same as self.cell = self._cell_nodes(_eps0, _eps1, _eps2)
-                self._cell_index(self, _eps0, _eps1, _eps2)
+                self._cell_index(_eps0, _eps1, _eps2)
                 self.cpoint = _cpoint
                 self.ppoint = _pred_ppoint
                 return _cpoint
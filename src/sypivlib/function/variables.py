@@ -3,7 +3,32 @@
 # TODO: Add more variables
 #  Enthalpies, Vorticity, Entropy, Turbulence Parameters, Gradients, Move metrics here?
 #  Total quantities
+import math
 import numpy as np
+from numba import njit, prange
+
+# q arrays up to this many values use the thread-free kernel; the interpolated points of an integration step
+# are far below it, whole grids far above, and thread start-up outweighs the loop for anything this small
+_SERIAL_MAX_SIZE = 2 ** 16
+
+
+@njit(parallel=True, fastmath=True, error_model='numpy', cache=True)
+def _velocity_kernel(q, velocity, velocity_magnitude):
+    # Velocity components and magnitude in a single pass over q of shape (ni, nj, nk, 5, nb)
+    # Loops over the flattened nodes so that a batch of points (1, 1, n, 5, nb) is split across threads too
+    ni, nj, nk, _, nb = q.shape
+    for _n in prange(ni * nj * nk):
+        i, j, k = _n // (nj * nk), (_n // nk) % nj, _n % nk
+        for b in range(nb):
+            _inv = 1 / q[i, j, k, 0, b]
+            u, v, w = q[i, j, k, 1, b] * _inv, q[i, j, k, 2, b] * _inv, q[i, j, k, 3, b] * _inv
+            velocity[i, j, k, 0, b], velocity[i, j, k, 1, b], velocity[i, j, k, 2, b] = u, v, w
+            velocity_magnitude[i, j, k, b] = math.sqrt(u * u + v * v + w * w)
+
+
+# Same kernel without numba threads; used for the handful of points interpolated per integration step
+# Not cached; see _accumulate_intensity_block in sypiv/intensity.py
+_velocity_kernel_serial = njit(fastmath=True, error_model='numpy')(_velocity_kernel.py_func)
 
 
 class Variables:
@@ -69,18 +94,36 @@ class Variables:
         :return: None
         """
         # velocity = [q1, q2, q3] / q0
-        self.velocity = self.flow.q[..., 1:4, :] / (self.flow.q[..., 0, :, None])
-        self.velocity_magnitude = (self.velocity[..., 0, :]**2 + self.velocity[..., 1, :]**2 + self.velocity[..., 2, :]**2)**0.5
+        _q = self.flow.q
+        _shape, _nb = _q.shape[:-2], _q.shape[-1]
+        _dtype = np.result_type(_q.dtype, np.float64)
+        # The kernel works on (ni, nj, nk, 5, nb); leading unit axes are views for lower dimensional q
+        _q = _q.reshape((1,) * (5 - _q.ndim) + _q.shape)
+        # Outputs are C-ordered like q from the other Variables methods; the kernel writes into views of them
+        self.velocity = np.empty(_shape + (3, _nb), dtype=_dtype)
+        self.velocity_magnitude = np.empty(_shape + (_nb,), dtype=_dtype)
+        _velocity = self.velocity.reshape(_q.shape[:3] + (3, _nb))
+        _velocity_magnitude = self.velocity_magnitude.reshape(_q.shape[:3] + (_nb,))
+        if _q.size <= _SERIAL_MAX_SIZE:
+            # A few interpolated points per integration step; threads and reordering would cost more than the loop
+            _velocity_kernel_serial(_q, _velocity, _velocity_magnitude)
+            return
+
+        # Loop over the node axes in memory order of q; q from read_flow has i as the fastest axis
+        _order = np.argsort(_q.strides[:3], kind='stable')[::-1]
+        _velocity_kernel(_q.transpose(*_order, 3, 4), _velocity.transpose(*_order, 3, 4),
+                         _velocity_magnitude.transpose(*_order, 3))
 
         return
 
     def compute_temperature(self):
         """
         Function to compute temperature.
-        This computes velocity first
+        This computes velocity first, if not already computed
         :return: None
         """
-        self.compute_velocity()
+        if self.velocity is None:
+            self.compute_velocity()
         _q4 = self.flow.q[..., 4, :]
         self.temperature = (self.gamma - 1) * (_q4/self.density - self.velocity_magnitude**2/2) / self.gas_constant
 
@@ -89,9 +132,11 @@ class Variables:
     def compute_mach(self):
         """
         Function to compute local mach number
+        This computes temperature first, if not already computed
         Returns: None
         """
-        self.compute_temperature()
+        if self.temperature is None:
+            self.compute_temperature()
         self.mach = self.velocity_magnitude / np.sqrt(self.gamma * self.gas_constant * self.temperature)
 
         return
@@ -99,10 +144,11 @@ class Variables:
     def compute_pressure(self):
         """
         Function to compute pressure.
-        This computes velocity and temperature first
+        This computes velocity, temperature and mach first, if not already computed
         :return: None
         """
-        self.compute_mach()
+        if self.mach is None:
+            self.compute_mach()
         self.pressure = self.density * self.temperature * self.gas_constant
 
         return
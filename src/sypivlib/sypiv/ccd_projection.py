@@ -14,8 +14,39 @@ class CCDProjection:
         self.xres = xres
         self.yres = yres
         self.dpi = dpi
-        self.projections = np.empty((self.particles.locations.shape[0], 3))
-        self.projections2 = np.empty((self.particles.locations2.shape[0], 3))
+        # projections are stored per component as contiguous 1d arrays; x, y, diameter
+        self.proj_x, self.proj_y, self.proj_d = None, None, None
+        self.proj2_x, self.proj2_y, self.proj2_d = None, None, None
+
+    @property
+    def projections(self):
+        # a new n x 3 array is assembled on every access; hot paths use proj_x, proj_y and proj_d
+        if self.proj_x is None:
+            return None
+        return np.column_stack((self.proj_x, self.proj_y, self.proj_d))
+
+    @projections.setter
+    def projections(self, _projections):
+        _projections = np.asarray(_projections, dtype=np.float64).reshape(-1, 3)
+        self.proj_x, self.proj_y, self.proj_d = (np.ascontiguousarray(_projections[:, _i]) for _i in range(3))
+
+    @property
+    def projections2(self):
+        if self.proj2_x is None:
+            return None
+        return np.column_stack((self.proj2_x, self.proj2_y, self.proj2_d))
+
+    @projections2.setter
+    def projections2(self, _projections):
+        _projections = np.asarray(_projections, dtype=np.float64).reshape(-1, 3)
+        self.proj2_x, self.proj2_y, self.proj2_d = (np.ascontiguousarray(_projections[:, _i]) for _i in range(3))
+
+    def _project(self, _x, _y, _z, _origin_x, _origin_y):
+        # Internal method to project one snap of particles; returns x and y in pixels
+        # Adjust locations to origin before projection
+        # Same scale applies to x and y; includes the conversion to pixels for further processing
+        _scale = self.d_ccd / (_z - _z[0] - self.d_ia) * self.dpi / 25.4e-3
+        return (_x - _origin_x) * _scale, (_y - _origin_y) * _scale
 
     def compute(self):
         """
@@ -27,28 +58,16 @@ class CCDProjection:
         projections2: np.ndarray of shape (nx3)
         (x,y,d) --> locations of particles in pixels and their respective diameters in meters
         """
-        loc = self.particles.locations
-        origin = [np.mean(self.particles.ia_bounds[:2]), np.mean(self.particles.ia_bounds[2:]), loc[0, 2]]
-        # Adjust locations to origin before projection
-        loc_adj = loc[:, :3] - origin
-        self.projections[:, 0] = loc_adj[:, 0] * self.d_ccd / (loc_adj[:, 2] - self.d_ia)
-        self.projections[:, 1] = loc_adj[:, 1] * self.d_ccd / (loc_adj[:, 2] - self.d_ia)
-        self.projections[:, 2] = loc[:, 3]
-
-        # Convert to pixels for further processing
-        self.projections[:, :2] = self.projections[:, :2] * self.dpi / 25.4e-3
+        p = self.particles
+        # Both snaps share the IA centre; only the depth of the origin follows each snap
+        _origin_x, _origin_y = np.mean(p.ia_bounds[:2]), np.mean(p.ia_bounds[2:])
+        self.proj_x, self.proj_y = self._project(p.loc_x, p.loc_y, p.loc_z, _origin_x, _origin_y)
+        # copies; the projection keeps its own diameters if the particle arrays are changed in place
+        self.proj_d = p.loc_d.copy()
 
         # Compute projections for the second snap
-        loc = self.particles.locations2
-        origin = [np.mean(self.particles.ia_bounds[:2]), np.mean(self.particles.ia_bounds[2:]), loc[0, 2]]
-        # Adjust locations to origin before projection
-        loc_adj = loc[:, :3] - origin
-        self.projections2[:, 0] = loc_adj[:, 0] * self.d_ccd / (loc_adj[:, 2] - self.d_ia)
-        self.projections2[:, 1] = loc_adj[:, 1] * self.d_ccd / (loc_adj[:, 2] - self.d_ia)
-        self.projections2[:, 2] = loc[:, 3]
-
-        # Convert to pixels for further processing
-        self.projections2[:, :2] = self.projections2[:, :2] * self.dpi / 25.4e-3
+        self.proj2_x, self.proj2_y = self._project(p.loc2_x, p.loc2_y, p.loc2_z, _origin_x, _origin_y)
+        self.proj2_d = p.loc2_d.copy()
 
         return
 
@@ -1,7 +1,7 @@
 # Creates 3d IA from grid and flow data
 # Spawns particles on a distribution and returns their locations
 import numpy as np
-from multiprocessing import cpu_count, Pool
+from scipy.stats import truncnorm
 from ..function.variables import Variables
 from ..function.search import Search
 from ..function.interpolation import Interpolation
@@ -27,6 +27,8 @@ class Particle:
         self.density = None
         self.n_concentration = None
         self.particle_field = None
+        # random generator for the diameters; set a seeded np.random.Generator for reproducible runs
+        self.rng = rng
 
     def compute_distribution(self):
         """
@@ -38,9 +40,16 @@ class Particle:
             print("When Gaussian distribution is used,"
                   " the particle statistics are computed using mean and std diameters\n"
                   "Particle min and max are cutoffs for the distribution")
-            self.particle_field = rng.normal(self.mean_dia, self.std_dia, int(self.n_concentration))
-            self.particle_field = np.clip(self.particle_field, self.min_dia, self.max_dia)
-            rng.shuffle(self.particle_field)
+            if self.std_dia == 0:
+                # truncated normal is undefined; all particles take the mean diameter
+                self.particle_field = np.full(int(self.n_concentration),
+                                              np.clip(self.mean_dia, self.min_dia, self.max_dia), dtype=np.float64)
+                return
+            # Sample the truncated normal directly; clipping would pile up the tails at min and max
+            _a = (self.min_dia - self.mean_dia) / self.std_dia
+            _b = (self.max_dia - self.mean_dia) / self.std_dia
+            self.particle_field = truncnorm.rvs(_a, _b, loc=self.mean_dia, scale=self.std_dia,
+                                                size=int(self.n_concentration), random_state=self.rng)
             return
 
         # TODO: Add Uniform distribution
@@ -90,31 +99,79 @@ class CreateParticles:
         self.ia_bounds = ia_bounds
         # percent of particles in-plane; rest will be divided equally above and below the ia_plane
         self.in_plane = None
-        # locations is an n x 4 array; [x, y, z, diameter]
-        self.locations = None
-        self.locations2 = []
+        # particle data is stored per component as contiguous 1d arrays; x, y, z, diameter
+        # locations and locations2 return them as n x 4 arrays; [x, y, z, diameter]
+        self.loc_x, self.loc_y, self.loc_z, self.loc_d = None, None, None, None
+        self.loc2_x, self.loc2_y, self.loc2_z, self.loc2_d = None, None, None, None
         self._failed_ids = []
+        # random generator for the particle locations; set a seeded or spawned np.random.Generator
+        # to get reproducible or independent streams per snapshot
+        self.rng = rng
         print(f"ia_bounds should be with in:\n"
               f"In x-direction: {self.grid.grd_min[:, 0]} and {self.grid.grd_max[:, 0]}\n"
               f"In y-direction: {self.grid.grd_min[:, 1]} and {self.grid.grd_max[:, 1]}\n")
 
+    @staticmethod
+    def _stack(_x, _y, _z, _d):
+        # Internal method to assemble the per-component arrays into an n x 4 array
+        if _x is None:
+            return None
+        return np.column_stack((_x, _y, _z, _d))
+
+    @staticmethod
+    def _split(_locations):
+        # Internal method to split an n x 4 array into contiguous per-component arrays
+        _locations = np.asarray(_locations, dtype=np.float64).reshape(-1, 4)
+        return tuple(np.ascontiguousarray(_locations[:, _i]) for _i in range(4))
+
+    @property
+    def locations(self):
+        # a new n x 4 array is assembled on every access; hot paths use loc_x, loc_y, loc_z and loc_d
+        return self._stack(self.loc_x, self.loc_y, self.loc_z, self.loc_d)
+
+    @locations.setter
+    def locations(self, _locations):
+        self.loc_x, self.loc_y, self.loc_z, self.loc_d = self._split(_locations)
+
+    @property
+    def locations2(self):
+        return self._stack(self.loc2_x, self.loc2_y, self.loc2_z, self.loc2_d)
+
+    @locations2.setter
+    def locations2(self, _locations):
+        self.loc2_x, self.loc2_y, self.loc2_z, self.loc2_d = self._split(_locations)
+
     def compute_locations(self):
         # Uniform distribution
-        # In-plane points
         _particles_in_plane = int(self.in_plane * self.particle.n_concentration * 0.01)
-        _x_loc = rng.uniform(self.ia_bounds[0], self.ia_bounds[1], _particles_in_plane)
-        _y_loc = rng.uniform(self.ia_bounds[2], self.ia_bounds[3], _particles_in_plane)
-        _z_loc = np.repeat(self.laser_sheet.position, _particles_in_plane)
-        self.locations = np.vstack((_x_loc, _y_loc, _z_loc, self.particle.particle_field[:_particles_in_plane])).T
+        _particles_off_plane = int(self.particle.n_concentration - _particles_in_plane)
+        _n = _particles_in_plane + _particles_off_plane
+
+        # Pre-define the particle data and fill in-plane and off-plane blocks in place
+        self.loc_x = np.empty(_n, dtype=np.float64)
+        self.loc_y = np.empty(_n, dtype=np.float64)
+        self.loc_z = np.empty(_n, dtype=np.float64)
+        self.loc_d = np.empty(_n, dtype=np.float64)
+
+        # x and y have the same bounds in and off the plane; draw all of them at once into the arrays
+        # and scale in place to the bounds
+        self.rng.random(out=self.loc_x)
+        self.loc_x *= self.ia_bounds[1] - self.ia_bounds[0]
+        self.loc_x += self.ia_bounds[0]
+        self.rng.random(out=self.loc_y)
+        self.loc_y *= self.ia_bounds[3] - self.ia_bounds[2]
+        self.loc_y += self.ia_bounds[2]
+
+        # In-plane points
+        self.loc_z[:_particles_in_plane] = self.laser_sheet.position
 
         # Off-plane locations - randomize z
-        _particles_off_plane = int(self.particle.n_concentration - _particles_in_plane)
-        _x_loc = rng.uniform(self.ia_bounds[0], self.ia_bounds[1], _particles_off_plane)
-        _y_loc = rng.uniform(self.ia_bounds[2], self.ia_bounds[3], _particles_off_plane)
-        _z_loc = rng.uniform(self.laser_sheet.width[0], self.laser_sheet.width[1], _particles_off_plane)
-        self.locations = np.concatenate((self.locations,
-                                         np.vstack((_x_loc, _y_loc, _z_loc,
-                                                    self.particle.particle_field[_particles_in_plane:])).T), axis=0)
+        _z = self.loc_z[_particles_in_plane:]
+        self.rng.random(out=_z)
+        _z *= self.laser_sheet.width[1] - self.laser_sheet.width[0]
+        _z += self.laser_sheet.width[0]
+
+        self.loc_d[:] = self.particle.particle_field[:_n]
 
         return
 
@@ -142,28 +199,47 @@ class CreateParticles:
             print(f"***Error in task {_task_id}***")
             return None
 
+    def _velocity_batch(self, _points):
+        # _Internal method to get velocities at an array of p-space points; nan for points out of domain
+        _idx = Search(self.grid, _points)
+        _idx.compute_batch()
+        _interp = Interpolation(self.flow, _idx)
+        _interp.compute_batch()
+        _var = Variables(_interp)
+        _var.compute_velocity()
+        return _var.velocity.reshape(-1, 3)
+
     def compute_locations2(self):
         """
         Will integrate particles to new locations based on
         Laser pulse time and velocities at their locations
+        All particles are searched, interpolated and integrated (pRK4) at once
         :return:
         """
-
-        # setup parameters for multiprocessing
-        _tasks = np.arange(len(self.locations))
-        n = max(1, cpu_count() - 1)
-        pool = Pool(n)
-        self.locations2 = pool.starmap(self._process, zip(self.locations, _tasks))
-        pool.close()
-        pool.join()
-
-        # delete failed tasks
-        self.locations = np.delete(self.locations, self._failed_ids, axis=0)
-
-        self.locations2 = np.array(self.locations2)
-        self.locations2 = np.delete(self.locations2, self._failed_ids, axis=0)
-        print(f"Total number of particles as per locations: {len(self.locations)}")
-        print(f"Total number of particles as per locations2: {len(self.locations2)}")
+        _dt = self.laser_sheet.pulse_time
+        _x0 = np.column_stack((self.loc_x, self.loc_y, self.loc_z))
+
+        # RK4 in p-space for all the particles
+        _u0 = self._velocity_batch(_x0)
+        _k0 = _dt * _u0
+        _k1 = _dt * self._velocity_batch(_x0 + 0.5 * _k0)
+        _k2 = _dt * self._velocity_batch(_x0 + 0.5 * _k1)
+        _k3 = _dt * self._velocity_batch(_x0 + _k2)
+        _new_loc = _x0 + 1/6 * (_k0 + 2*_k1 + 2*_k2 + _k3)
+
+        # make sure the point moves out of the grid for second image
+        _euler = np.isnan(_new_loc).any(axis=1)
+        _new_loc[_euler] = _x0[_euler] + _k0[_euler]
+
+        # delete failed particles; particles not found in the grid
+        _failed = np.isnan(_new_loc).any(axis=1)
+        self._failed_ids = np.nonzero(_failed)[0].tolist()
+        self.loc_x, self.loc_y, self.loc_z, self.loc_d = (_a[~_failed] for _a in
+                                                          (self.loc_x, self.loc_y, self.loc_z, self.loc_d))
+        self.loc2_x, self.loc2_y, self.loc2_z = (np.ascontiguousarray(_new_loc[~_failed, _i]) for _i in range(3))
+        self.loc2_d = self.loc_d.copy()
+        print(f"Total number of particles as per locations: {len(self.loc_x)}")
+        print(f"Total number of particles as per locations2: {len(self.loc2_x)}")
         print(f"Failed number of particles: {len(self._failed_ids)}")
 
         return
@@ -176,18 +252,24 @@ class CreateParticles:
         """
 
         # for loop for serial computation. Track using tqdm computing locations...
-        for _i, _j in enumerate(tqdm.tqdm(self.locations, desc="Computing locations for second image")):
-            self.locations2.append(self._process(_j, _i))
+        # results are written in place; failed tasks are flagged instead of appending None
+        _locations2 = np.empty((len(self.loc_x), 4))
+        _valid = np.ones(len(self.loc_x), dtype=bool)
+        _locations = zip(self.loc_x, self.loc_y, self.loc_z, self.loc_d)
+        for _i, _j in enumerate(tqdm.tqdm(_locations, total=len(self.loc_x),
+                                          desc="Computing locations for second image")):
+            _temp = self._process(_j, _i)
+            if _temp is None:
+                _valid[_i] = False
+            else:
+                _locations2[_i] = _temp
 
         # delete failed tasks
-        # self.locations = np.delete(self.locations, self._failed_ids, axis=0)
-
-        self.locations2 = np.array(self.locations2)
-        self.locations2 = np.delete(self.locations2, self._failed_ids, axis=0)
-        # convert to float64
-        self.locations2 = np.array(list(self.locations2), dtype=np.float64)
-        print(f"Total number of particles as per locations: {len(self.locations)}")
-        print(f"Total number of particles as per locations2: {len(self.locations2)}")
+        self.loc_x, self.loc_y, self.loc_z, self.loc_d = (_a[_valid] for _a in
+                                                          (self.loc_x, self.loc_y, self.loc_z, self.loc_d))
+        self.locations2 = _locations2[_valid]
+        print(f"Total number of particles as per locations: {len(self.loc_x)}")
+        print(f"Total number of particles as per locations2: {len(self.loc2_x)}")
         print(f"Failed number of particles: {len(self._failed_ids)}")
 
         return
@@ -202,33 +284,38 @@ class CreateParticles:
         comm = MPI.COMM_WORLD
         rank = comm.Get_rank()
         size = comm.Get_size()
-        self.locations = np.array_split(self.locations, size)[rank]
+        self.loc_x, self.loc_y, self.loc_z, self.loc_d = (np.array_split(_a, size)[rank] for _a in
+                                                          (self.loc_x, self.loc_y, self.loc_z, self.loc_d))
         # for loop for serial computation. Track using tqdm computing locations...
-        for _i, _j in enumerate(tqdm.tqdm(self.locations, desc="Computing locations for second image")):
-            # do not append None to locations
+        # results are written in place; failed tasks are flagged instead of appending None
+        _locations2 = np.empty((len(self.loc_x), 4))
+        _valid = np.ones(len(self.loc_x), dtype=bool)
+        _locations = zip(self.loc_x, self.loc_y, self.loc_z, self.loc_d)
+        for _i, _j in enumerate(tqdm.tqdm(_locations, total=len(self.loc_x),
+                                          desc="Computing locations for second image")):
             _temp = self._process(_j, _i)
-            if _temp is not None:
-                self.locations2.append(_temp)
+            if _temp is None:
+                _valid[_i] = False
+            else:
+                _locations2[_i] = _temp
 
         # delete failed tasks on each rank
-        # self.locations = np.delete(self.locations, self._failed_ids, axis=0)
-        self.locations2 = np.array(self.locations2)
-        # self.locations2 = np.delete(self.locations2, self._failed_ids, axis=0)
-        # convert to float64
-        self.locations2 = np.array(list(self.locations2), dtype=np.float64)
+        self.loc_x, self.loc_y, self.loc_z, self.loc_d = (_a[_valid] for _a in
+                                                          (self.loc_x, self.loc_y, self.loc_z, self.loc_d))
+        self.locations2 = _locations2[_valid]
 
         # gather all the locations
-        self.locations = comm.gather(self.locations, root=0)
-        self.locations2 = comm.gather(self.locations2, root=0)
+        _locations = comm.gather(self.locations, root=0)
+        _locations2 = comm.gather(self.locations2, root=0)
         if rank == 0:
-            self.locations = np.concatenate(self.locations, axis=0)
-            self.locations2 = np.concatenate(self.locations2, axis=0)
-            print(f"Total number of particles as per locations: {len(self.locations)}")
-            print(f"Total number of particles as per locations2: {len(self.locations2)}")
+            _locations = np.concatenate(_locations, axis=0)
+            _locations2 = np.concatenate(_locations2, axis=0)
+            print(f"Total number of particles as per locations: {len(_locations)}")
+            print(f"Total number of particles as per locations2: {len(_locations2)}")
             print(f"Failed number of particles: {len(self._failed_ids)}")
 
-        self.locations = comm.bcast(self.locations, root=0)
-        self.locations2 = comm.bcast(self.locations2, root=0)
+        self.locations = comm.bcast(_locations, root=0)
+        self.locations2 = comm.bcast(_locations2, root=0)
 
         return
 
@@ -1,8 +1,14 @@
 # Generate first and second images imitating PIV
 
 import numpy as np
-import matplotlib.pyplot as plt
 from mpi4py import MPI
+from .intensity import _pixel_axes
+
+
+def _plt():
+    # pyplot is imported on first use; it is a large share of the package import time
+    import matplotlib.pyplot as plt
+    return plt
 
 
 class ImageGen:
@@ -21,6 +27,7 @@ class ImageGen:
         Function to generate first snap from the intensity data
         :return:
         """
+        plt = _plt()
         self.snap_num = snap_num
         # Specified in inches --> python default
         xsize = self.intensity.projection.xres / self.intensity.projection.dpi
@@ -41,6 +48,7 @@ class ImageGen:
         Function to generate first snap from the intensity data
         :return:
         """
+        plt = _plt()
         comm = MPI.COMM_WORLD
         rank = comm.Get_rank()
         self.snap_num = snap_num
@@ -58,6 +66,7 @@ class ImageGen:
         return
 
     def save_snap(self, fname=None):
+        plt = _plt()
         if fname is None:
             fname = "snap_" + str(self.snap_num) + ".tif"
         self.fig.savefig(fname=fname)
@@ -67,6 +76,7 @@ class ImageGen:
         return
 
     def save_snap_mpi(self, fname=None):
+        plt = _plt()
         comm = MPI.COMM_WORLD
         rank = comm.Get_rank()
         if rank == 0:
@@ -87,6 +97,7 @@ class ImageGen:
         4. Image of the particle snaps - This can be saved!
         :return:
         """
+        plt = _plt()
         print("Data at various steps during image generation will be plotted...")
 
         # Plot data after creating particles
@@ -96,33 +107,34 @@ class ImageGen:
         _in_plane = int(particles.particle.n_concentration *
                         particles.in_plane * 0.01)
         # plot in-plane particle locations
-        plt.scatter(particles.locations[:_in_plane, 0], particles.locations[:_in_plane, 1],
-                    s=10 * particles.locations[:_in_plane, 3] / particles.particle.min_dia, c='g', label='in-plane')
+        plt.scatter(particles.loc_x[:_in_plane], particles.loc_y[:_in_plane],
+                    s=10 * particles.loc_d[:_in_plane] / particles.particle.min_dia, c='g', label='in-plane')
         # plot out-of-plane locations
-        plt.scatter(particles.locations[_in_plane:, 0], particles.locations[_in_plane:, 1],
-                    s=10 * particles.locations[_in_plane:, 3] / particles.particle.min_dia, c='r', label='out-of-plane')
+        plt.scatter(particles.loc_x[_in_plane:], particles.loc_y[_in_plane:],
+                    s=10 * particles.loc_d[_in_plane:] / particles.particle.min_dia, c='r', label='out-of-plane')
         plt.title('Particles created on the given IA')
         plt.legend()
 
         # Plot data after particle projection
         plt.figure()
         proj = self.intensity.projection
-        plt.scatter(proj.projections[:_in_plane, 0], proj.projections[:_in_plane, 1], c='g',
-                    s=10 * proj.projections[:_in_plane, 2] / particles.particle.min_dia, label='in-plane')
+        plt.scatter(proj.proj_x[:_in_plane], proj.proj_y[:_in_plane], c='g',
+                    s=10 * proj.proj_d[:_in_plane] / particles.particle.min_dia, label='in-plane')
         # plot out-of-plane locations
-        plt.scatter(proj.projections[_in_plane:, 0], proj.projections[_in_plane:, 1], c='r',
-                    s=10 * proj.projections[_in_plane:, 2] / particles.particle.min_dia, label='out-of-plane')
+        plt.scatter(proj.proj_x[_in_plane:], proj.proj_y[_in_plane:], c='r',
+                    s=10 * proj.proj_d[_in_plane:] / particles.particle.min_dia, label='out-of-plane')
         plt.title('Projected data; shown in pixels; particle sizes are representative;\n data is mirrored')
         plt.legend()
 
         # Plot data in contours
         xsize = proj.xres / self.intensity.projection.dpi
         ysize = proj.yres / self.intensity.projection.dpi
-        x = np.linspace(-proj.xres / 2, proj.xres / 2, proj.xres)
-        y = np.linspace(-proj.yres / 2, proj.yres / 2, proj.yres)
+        # 1d pixel axes shared with the intensity computation; no per-call linspace or meshgrid
+        x, y = _pixel_axes(proj.xres, proj.yres)
         fig = plt.figure(figsize=[xsize, ysize], dpi=proj.dpi)
-        ax = plt.axes([0.0, 0.0, 1.0, 1.0], xlim=(min(x), max(x)), ylim=(min(y), max(y)))
-        ax.contourf(x, y, self.intensity.values, cmap='hot')
+        ax = plt.axes([0.0, 0.0, 1.0, 1.0], xlim=(x[0], x[-1]), ylim=(y[0], y[-1]))
+        # contourpy's serial algorithm; faster than the default mpl2014 tracer
+        ax.contourf(x, y, self.intensity.values, cmap='hot', algorithm='serial')
         ax.set_title('Contour plot of intensities')
 
         # Show the image
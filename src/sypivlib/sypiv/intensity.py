@@ -1,8 +1,9 @@
 # Generate intensity field at particle particles
+import math
+from functools import lru_cache
 from scipy.special import erf
 import numpy as np
-from multiprocessing import Pool
-from multiprocessing import cpu_count
+from numba import njit, prange, cuda
 import dask.array as da
 import tqdm
 from mpi4py import MPI
@@ -13,6 +14,132 @@ from mpi4py import MPI
 # sys.setrecursionlimit(10**6)
 
 
+# Particle images are evaluated up to this many standard deviations (sx, sy) beyond the fill ratio
+# Contributions outside are below 1e-6 of the peak and are dropped
+_PSF_CUTOFF = 5.0
+
+
+@lru_cache(maxsize=8)
+def _pixel_axes(xres, yres):
+    # 1d pixel axes of the CCD; cached for repeated images of the same resolution
+    # The arrays are shared between Intensity objects, so they are made read-only
+    x = np.linspace(-xres / 2, xres / 2, xres)
+    y = np.linspace(-yres / 2, yres / 2, yres)
+    x.flags.writeable = False
+    y.flags.writeable = False
+    return x, y
+
+
+@njit(cache=True)
+def _particle_box(axis, sigma, fill_ratio):
+    # Pixel spacing of a CCD axis, half-width of a particle image and the widest box of pixels it can cover
+    # Shared by the kernel and Intensity._chunksize, so chunks are sized from the pixels the kernel touches
+    n = axis.shape[0]
+    d = (axis[-1] - axis[0]) / (n - 1) if n > 1 else 1.0
+    r = 0.5 * fill_ratio + _PSF_CUTOFF * sigma
+    return d, r, min(int(math.ceil(2 * r / d)) + 3, n)
+
+
+# The compiled kernel is cached in __pycache__ under the module's import name
+# Import the package as sypivlib; importing it through src.sypivlib is not supported and cannot share that cache
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def _accumulate_intensity(x_axis, y_axis, xp, yp, amp, sx, sy, frx, fry, out):
+    # Fused kernel for the intensity field; adds the contribution of every particle into out
+    # Runs on numba's persistent thread pool and releases the GIL, so no worker processes are needed
+    # The erf terms are separable in x and y, so they are evaluated once per particle on the 1d axes
+    # Each particle only covers a small box of pixels around (xp, yp); the rest of the CCD is skipped
+    # amp is the peak factor of each particle, computed once outside the kernel (Intensity._amplitude)
+    n_particles = xp.shape[0]
+    xres = x_axis.shape[0]
+    yres = y_axis.shape[0]
+    # pixel spacing, half-width of the particle image and width of its box of pixels
+    dx, rx, wx = _particle_box(x_axis, sx, frx)
+    dy, ry, wy = _particle_box(y_axis, sy, fry)
+    _sx = 1 / (sx * math.sqrt(2))
+    _sy = 1 / (sy * math.sqrt(2))
+    # half fill ratio in units of the erf argument
+    _hx = 0.5 * frx * _sx
+    _hy = 0.5 * fry * _sy
+    # pixel bounds of the box for each particle; [i0, i1) in x and [j0, j1) in y
+    i0 = np.empty(n_particles, dtype=np.int64)
+    i1 = np.empty(n_particles, dtype=np.int64)
+    j0 = np.empty(n_particles, dtype=np.int64)
+    j1 = np.empty(n_particles, dtype=np.int64)
+    # erf terms are stored per particle only over its box; column 0 is pixel i0 (j0)
+    fx = np.empty((n_particles, wx), dtype=np.float32)
+    fy = np.empty((n_particles, wy), dtype=np.float32)
+    for p in prange(n_particles):
+        i0[p] = int(min(max(math.floor((xp[p] - rx - x_axis[0]) / dx), 0.0), xres))
+        i1[p] = int(min(max(math.ceil((xp[p] + rx - x_axis[0]) / dx) + 1, 0.0), xres))
+        j0[p] = int(min(max(math.floor((yp[p] - ry - y_axis[0]) / dy), 0.0), yres))
+        j1[p] = int(min(max(math.ceil((yp[p] + ry - y_axis[0]) / dy) + 1, 0.0), yres))
+        for i in range(i0[p], i1[p]):
+            _u = (x_axis[i] - xp[p]) * _sx
+            fx[p, i - i0[p]] = math.erf(_u + _hx) - math.erf(_u - _hx)
+        for j in range(j0[p], j1[p]):
+            _u = (y_axis[j] - yp[p]) * _sy
+            fy[p, j - j0[p]] = math.erf(_u + _hy) - math.erf(_u - _hy)
+
+    # rows are split between threads; avoids races on out
+    # particles are sorted by j0; only those with j0 in (j - wy, j] can cover row j
+    order = np.argsort(j0)
+    j0_sorted = j0[order]
+    for j in prange(yres):
+        start = np.searchsorted(j0_sorted, j - wy + 1)
+        stop = np.searchsorted(j0_sorted, j, side='right')
+        for k in range(start, stop):
+            p = order[k]
+            if j < j1[p]:
+                _a = np.float32(amp[p] * fy[p, j - j0[p]])
+                for i in range(i0[p], i1[p]):
+                    out[j, i] += _a * fx[p, i - i0[p]]
+
+    return out
+
+
+# Same kernel without numba threads; used where the caller provides the parallelism, e.g. dask blocks
+# Not cached; numba keys the on-disk cache on the python function, which is shared with the threaded build,
+# so a cached entry of one would be loaded for the other. _velocity_kernel_serial follows the same rule
+_accumulate_intensity_block = njit(fastmath=True, nogil=True)(_accumulate_intensity.py_func)
+
+
+@lru_cache(maxsize=1)
+def _warm_up():
+    # Compile, or load from the on-disk cache, the fused kernel once per process
+    # One particle on a tiny image with the same argument types as Intensity.compute
+    x, y = _pixel_axes(4, 4)
+    _accumulate_intensity(x, y, np.zeros(1), np.zeros(1), np.ones(1), 1.0, 1.0, 1.0, 1.0,
+                          np.zeros((4, 4), dtype=np.float32))
+
+
+@cuda.jit
+def _psf_splat_kernel(x_axis, y_axis, xp, yp, amp, sx, sy, frx, fry, out):
+    # CUDA kernel; one block per particle
+    # Threads of the block cover the bounding box of the particle image and add into out atomically
+    p = cuda.blockIdx.x
+    xres = x_axis.shape[0]
+    yres = y_axis.shape[0]
+    dx = (x_axis[xres - 1] - x_axis[0]) / (xres - 1) if xres > 1 else 1.0
+    dy = (y_axis[yres - 1] - y_axis[0]) / (yres - 1) if yres > 1 else 1.0
+    rx = 0.5 * frx + _PSF_CUTOFF * sx
+    ry = 0.5 * fry + _PSF_CUTOFF * sy
+    _sx = 1 / (sx * math.sqrt(2.0))
+    _sy = 1 / (sy * math.sqrt(2.0))
+    _hx = 0.5 * frx * _sx
+    _hy = 0.5 * fry * _sy
+    i0 = int(min(max(math.floor((xp[p] - rx - x_axis[0]) / dx), 0.0), xres))
+    i1 = int(min(max(math.ceil((xp[p] + rx - x_axis[0]) / dx) + 1, 0.0), xres))
+    j0 = int(min(max(math.floor((yp[p] - ry - y_axis[0]) / dy), 0.0), yres))
+    j1 = int(min(max(math.ceil((yp[p] + ry - y_axis[0]) / dy) + 1, 0.0), yres))
+    for j in range(j0 + cuda.threadIdx.y, j1, cuda.blockDim.y):
+        _v = (y_axis[j] - yp[p]) * _sy
+        _fy = amp[p] * (math.erf(_v + _hy) - math.erf(_v - _hy))
+        for i in range(i0 + cuda.threadIdx.x, i1, cuda.blockDim.x):
+            _u = (x_axis[i] - xp[p]) * _sx
+            _fx = math.erf(_u + _hx) - math.erf(_u - _hx)
+            cuda.atomic.add(out, (j, i), np.float32(_fy * _fx))
+
+
 class Intensity:
     """
     Parameters
@@ -41,6 +168,33 @@ class Intensity:
         self.projection = projection
         self.intensity = None
         self.values = None
+        # 1d pixel axes of the CCD; shared by all particles, compute methods and images of the same size
+        self._x_axis, self._y_axis = _pixel_axes(projection.xres, projection.yres)
+
+    def _chunksize(self, cache_bytes=2 * 1024 ** 2):
+        # _Internal method to size particle chunks for the fused kernel
+        # Per-particle buffers of a chunk (erf terms over the bounding box, box bounds) should fit in cache_bytes
+        (_, _, _, _, sx, sy, frx, fry, _, _, _) = self.cache
+        _, _, _wx = _particle_box(self._x_axis, float(sx), float(frx))
+        _, _, _wy = _particle_box(self._y_axis, float(sy), float(fry))
+        # float32 erf terms, int64 bounds and sort order, float64 particle data
+        _bytes = 4 * (_wx + _wy) + 8 * 5 + 8 * 3
+        return max(1, int(cache_bytes // _bytes))
+
+    def _amplitude(self, dia_x, dia_y, z_physical):
+        # _Internal method to get the peak factor of each particle as one vector expression
+        # q is the efficiency factor with which particles scatter light
+        # s is the shape factor; 2 --> Gaussian, 10^4 --> uniform
+        (_, _, _, _, sx, sy, _, _, s, q, _) = self.cache
+        ls_thickness = self.projection.particles.laser_sheet.thickness
+        ls_position = self.projection.particles.laser_sheet.position
+        _z_rel = np.asarray(z_physical, dtype=np.float64) - ls_position
+        # normalized distance from the laser sheet; non-negative, so no abs is needed
+        _u = 2 / ls_thickness ** 2 * _z_rel * _z_rel
+        # Gaussian sheet is the common case; avoid the general power
+        _us = _u * _u if s == 2 else _u ** s
+        return (q * np.exp(-1 / np.sqrt(2 * np.pi) * _us) *
+                np.pi / 8 * sx * sy * np.asarray(dia_x, dtype=np.float64) * np.asarray(dia_y, dtype=np.float64))
 
     def setup(self, x, y, ls_thickness, ls_position, dia_x, dia_y, xp, yp, sx, sy, frx, fry, s, q, z_physical, _task):
         """
@@ -49,11 +203,15 @@ class Intensity:
 
         Parameters
         ----------
+        x, y : numpy.ndarray
+            1d pixel axes of the CCD; the field is separable in x and y
+        dia_x, dia_y, xp, yp, z_physical : float or numpy.ndarray
+            Data of a single particle or 1d arrays for a batch of particles
 
         Returns
         -------
-        intensity : function
-            Intensity field as a function of particle particles.
+        intensity : numpy.ndarray
+            Intensity field of shape (yres, xres) summed over the given particles.
 
         By: Dilip Kalagotla ~ kal @ dilip.kalagotla@gmail.com
         Date created: Mon May 17 11:00:56 2021
@@ -66,14 +224,21 @@ class Intensity:
         # q is the efficiency factor with which particles scatter light
         # s is the shape factor; 2 --> Gaussian, 10^4 --> uniform
 
-        self.intensity = (q *
-                          np.exp(-1 / np.sqrt(2 * np.pi) *
-                                 abs(2 * (z_physical - ls_position) ** 2 / ls_thickness ** 2) ** s) *
-                          (np.pi / 8 * dia_x * dia_y * sx * sy *
-                           (erf((x - xp + 0.5 * frx) / (sx * 2 ** 0.5)) -
-                            erf((x - xp - 0.5 * frx) / (sx * 2 ** 0.5))) *
-                           (erf((y - yp + 0.5 * fry) / (sy * 2 ** 0.5)) -
-                            erf((y - yp - 0.5 * fry) / (sy * 2 ** 0.5)))))
+        # erf terms are evaluated on the 1d axes for all particles; shapes (n, xres) and (n, yres)
+        xp = np.atleast_1d(xp)[:, None]
+        yp = np.atleast_1d(yp)[:, None]
+        _sx = 1 / (sx * 2 ** 0.5)
+        _sy = 1 / (sy * 2 ** 0.5)
+        _u = (x - xp) * _sx
+        _v = (y - yp) * _sy
+        _fx = erf(_u + 0.5 * frx * _sx) - erf(_u - 0.5 * frx * _sx)
+        _fy = erf(_v + 0.5 * fry * _sy) - erf(_v - 0.5 * fry * _sy)
+        _amp = np.atleast_1d(q *
+                             np.exp(-1 / np.sqrt(2 * np.pi) *
+                                    abs(2 * (np.asarray(z_physical) - ls_position) ** 2 / ls_thickness ** 2) ** s) *
+                             np.pi / 8 * np.asarray(dia_x) * np.asarray(dia_y) * sx * sy)
+        # sum of the outer products over particles as one matrix product
+        self.intensity = (_amp[:, None] * _fy).T @ _fx
         # end time
         # end = time.perf_counter()
 
@@ -82,172 +247,161 @@ class Intensity:
 
         return self.intensity
 
-    def compute(self, chunksize=5096):
-        # Using multiprocessing to compute relative intensity field
+    def compute(self, chunksize=None):
+        """
+        Computes the intensity field using the fused numba kernel
+        Particles are processed in chunks to limit the size of the erf buffers
+        :param chunksize: int
+            Number of particles sent to the kernel at once
+            Default is sized from the particle image so that the buffers of a chunk stay in cache
+        :return: numpy.ndarray
+            Intensity values normalized to rgb range
+        """
+        # compile or load the kernel before the first chunk; only the first call in a process pays for it
+        _warm_up()
         (dia_x, dia_y, xp, yp, sx, sy, frx, fry, s, q, z_physical) = self.cache
-        intensity = np.zeros((self.projection.yres, self.projection.xres))
-        # create meshgrid for x and y
-        x = np.linspace(-self.projection.xres / 2, self.projection.xres / 2, self.projection.xres)
-        y = np.linspace(-self.projection.yres / 2, self.projection.yres / 2, self.projection.yres)
-        x, y = np.meshgrid(x, y)
+        if chunksize is None:
+            chunksize = self._chunksize()
+        intensity = np.zeros((self.projection.yres, self.projection.xres), dtype=np.float32)
+        # the kernel uses the separable form of the integral on the 1d axes
+        x, y = self._x_axis, self._y_axis
 
-        # laser sheet thickness
-        ls_thickness = self.projection.particles.laser_sheet.thickness
-        ls_position = self.projection.particles.laser_sheet.position
+        # peak factor of each particle; only the erf terms are left to the kernel
+        amp = self._amplitude(dia_x, dia_y, z_physical)
 
-        i = 0
-        j = chunksize
-        pbar = tqdm.tqdm(total=len(xp), desc="Computing intensity field for particles", position=0, leave=True,
-                         colour='green')
-        while j <= len(xp):
-            n = max(1, cpu_count() - 1)
-            pool = Pool(n)
-            n_particles = len(dia_x[i:j])
-            # x, y, ls_thickness, ls_position,
-            # dia_x[i], dia_y[i], xp[i], yp[i], sx, sy, frx, fry, s, q, z_physical[i], i
-            itemp = pool.starmap(self.setup, zip([x]*n_particles, [y]*n_particles,
-                                                 np.repeat(ls_thickness, n_particles),
-                                                 np.repeat(ls_position, n_particles),
-                                                 dia_x[i:j], dia_y[i:j], xp[i:j], yp[i:j],
-                                                 np.repeat(sx, n_particles), np.repeat(sy, n_particles),
-                                                 np.repeat(frx, n_particles), np.repeat(fry, n_particles),
-                                                 np.repeat(s, n_particles), np.repeat(q, n_particles), z_physical[i:j],
-                                                 np.arange(n_particles)), chunksize=n_particles // n)
-            pool.close()
-            pool.join()
-
-            intensity += np.sum(itemp, axis=0)
-            i = j
-            j += chunksize
-            # print(f"Done with {i} particles out of {len(xp)}")
-            pbar.update(chunksize)
-
-        # compute the remaining particles
-        n = max(1, cpu_count() - 1)
-        pool = Pool(n)
-        n_particles = len(dia_x[i:])
-        itemp = pool.starmap(self.setup, zip([x]*n_particles, [y]*n_particles,
-                                             np.repeat(ls_thickness, n_particles),
-                                             np.repeat(ls_position, n_particles),
-                                             dia_x[i:], dia_y[i:], xp[i:], yp[i:],
-                                             np.repeat(sx, n_particles), np.repeat(sy, n_particles),
-                                             np.repeat(frx, n_particles), np.repeat(fry, n_particles),
-                                             np.repeat(s, n_particles), np.repeat(q, n_particles), z_physical[i:],
-                                             np.arange(n_particles)))
-        pool.close()
-        pool.join()
-        # print(f"Done with {len(xp)} particles out of {len(xp)}")
-        pbar.update(len(xp) - i)
-        pbar.close()
-
-        intensity += np.sum(itemp, axis=0)
-
-        # Average intensity field
-        intensity = intensity / len(xp)
-
-        # Normalize intensity field to rbg values
-        if np.max(intensity) != 0:
-            intensity = intensity / np.max(intensity) * 255
+        for i in tqdm.tqdm(range(0, len(xp), chunksize), desc="Computing intensity field for particles",
+                           position=0, leave=True, colour='green'):
+            j = i + chunksize
+            _accumulate_intensity(x, y,
+                                  np.ascontiguousarray(xp[i:j], dtype=np.float64),
+                                  np.ascontiguousarray(yp[i:j], dtype=np.float64),
+                                  amp[i:j], float(sx), float(sy), float(frx), float(fry), intensity)
+
+        # Normalize intensity field to rbg values; averaging over particles cancels out here
+        _max = np.max(intensity)
+        if _max != 0:
+            intensity *= 255 / _max
         print('Done computing intensity field')
 
         self.values = intensity
 
         return self.values
 
-    def compute_serial(self):
+    def compute_cuda(self, threads=(16, 16)):
+        """
+        Computes the intensity field on a CUDA gpu
+        Launches one block of threads per particle; falls back to compute when no gpu is available
+        :param threads: tuple
+            Threads per block in x and y
+        :return: numpy.ndarray
+            Intensity values normalized to rgb range
+        """
+        if not cuda.is_available():
+            print('No CUDA gpu found. Computing intensity field on the cpu')
+            return self.compute()
+
         (dia_x, dia_y, xp, yp, sx, sy, frx, fry, s, q, z_physical) = self.cache
-        intensity = np.zeros((self.projection.yres, self.projection.xres))
-        x = np.linspace(-self.projection.xres / 2, self.projection.xres / 2, self.projection.xres)
-        y = np.linspace(-self.projection.yres / 2, self.projection.yres / 2, self.projection.yres)
-        x, y = np.meshgrid(x, y)
+        x, y = self._x_axis, self._y_axis
+
+        # particle amplitudes are computed on the cpu; only the erf terms run on the gpu
+        amp = self._amplitude(dia_x, dia_y, z_physical)
+
+        # upload particle data once and accumulate on the device
+        d_out = cuda.to_device(np.zeros((self.projection.yres, self.projection.xres), dtype=np.float32))
+        _psf_splat_kernel[len(xp), threads](cuda.to_device(x), cuda.to_device(y),
+                                            cuda.to_device(np.ascontiguousarray(xp, dtype=np.float64)),
+                                            cuda.to_device(np.ascontiguousarray(yp, dtype=np.float64)),
+                                            cuda.to_device(amp),
+                                            float(sx), float(sy), float(frx), float(fry), d_out)
+        intensity = d_out.copy_to_host()
+
+        # Normalize intensity field to rbg values; averaging over particles cancels out here
+        _max = np.max(intensity)
+        if _max != 0:
+            intensity *= 255 / _max
+        print('Done computing intensity field')
+
+        self.values = intensity
+
+        return self.values
+
+    def compute_serial(self, chunksize=5096):
+        """
+        Computes the intensity field in a single process using setup
+        :param chunksize: int
+            Number of particles sent to setup at once
+        :return: numpy.ndarray
+            Intensity values normalized to rgb range
+        """
+        (dia_x, dia_y, xp, yp, sx, sy, frx, fry, s, q, z_physical) = self.cache
+        # float32 is sufficient as the field is normalized to rgb values
+        intensity = np.zeros((self.projection.yres, self.projection.xres), dtype=np.float32)
+        x, y = self._x_axis, self._y_axis
 
         # laser sheet thickness
         ls_thickness = self.projection.particles.laser_sheet.thickness
         ls_position = self.projection.particles.laser_sheet.position
 
-        for i in tqdm.tqdm(range(len(xp)), desc="Computing intensity field for particles"):
+        for i in tqdm.tqdm(range(0, len(xp), chunksize), desc="Computing intensity field for particles"):
+            j = i + chunksize
             intensity += self.setup(x, y, ls_thickness, ls_position,
-                                    dia_x[i], dia_y[i], xp[i], yp[i], sx, sy, frx, fry, s, q, z_physical[i], i)
-
-        # Average intensity field
-        intensity = intensity / len(xp)
+                                    dia_x[i:j], dia_y[i:j], xp[i:j], yp[i:j], sx, sy, frx, fry, s, q, z_physical[i:j],
+                                    i)
 
-        # Normalize intensity field to rbg values
-        if np.max(intensity) != 0:
-            intensity = intensity / np.max(intensity) * 255
+        # Normalize intensity field to rbg values; averaging over particles cancels out here
+        _max = np.max(intensity)
+        if _max != 0:
+            intensity *= 255 / _max
         print('Done computing intensity field')
 
         self.values = intensity
 
         return self.values
 
-    def compute_dask(self):
+    def compute_dask(self, chunksize=5096):
         """
         Ideal for computing intensity field for higher resolution images
-        :return:
+        Each dask block runs the fused kernel on a chunk of particles; the partial fields are summed
+        :param chunksize: int
+            Number of particles in each dask block
+        :return: numpy.ndarray
+            Intensity values normalized to rgb range
         """
         (dia_x, dia_y, xp, yp, sx, sy, frx, fry, s, q, z_physical) = self.cache
-
-        # convert arrays to dask arrays
-        dia_x = da.from_array(dia_x, chunks=1000)
-        dia_y = da.from_array(dia_y, chunks=1000)
-        xp = da.from_array(xp, chunks=1000)
-        yp = da.from_array(yp, chunks=1000)
-        z_physical = da.from_array(z_physical, chunks=1000)
-        intensity = np.zeros((self.projection.yres, self.projection.xres))
-        # holder for intensity field -- saves time during addition
-        da_intensity = da.zeros((self.projection.yres, self.projection.xres), chunks=(1000, 1000))
-
-        # create meshgrid for x and y
-        x = da.linspace(-self.projection.xres / 2, self.projection.xres / 2, self.projection.xres)
-        y = da.linspace(-self.projection.yres / 2, self.projection.yres / 2, self.projection.yres)
-        x, y = da.meshgrid(x, y)
-
-        # laser sheet thickness
-        ls_thickness = self.projection.particles.laser_sheet.thickness
-        ls_position = self.projection.particles.laser_sheet.position
-
-        # compute intensity for each particle location based on Gaussian distribution
-        # q is the efficiency factor with which particles scatter light
-        # s is the shape factor; 2 --> Gaussian, 10^4 --> uniform
-
-        # 200 particles at a time to avoid recursion limit
-        for j in tqdm.tqdm(range(0, len(xp), 200), desc=f"Computing intensity field for particles in chunks of 200",
-                           position=0, leave=True, colour='green'):
-            for i in tqdm.tqdm(range(j, j + 200 if j + 200 < len(xp) else len(xp)),
-                               desc=f"Setting up intensity field for particles {j} to"
-                                    f" {j + 200 if j + 200 < len(xp) else len(xp)}",
-                               position=1, leave=False, colour='blue'):
-                da_intensity = (da_intensity +
-                                (q *
-                                 da.exp(-1 / da.sqrt(2 * np.pi) *
-                                        abs(2 * (z_physical[i] - ls_position) ** 2 / ls_thickness ** 2) ** s) *
-                                 (np.pi / 8 * dia_x[i] * dia_y[i] * sx * sy *
-                                  (erf((x - xp[i] + 0.5 * frx) / (sx * 2 ** 0.5)) -
-                                   erf((x - xp[i] - 0.5 * frx) / (sx * 2 ** 0.5))) *
-                                  (erf((y - yp[i] + 0.5 * fry) / (sy * 2 ** 0.5)) -
-                                   erf((y - yp[i] - 0.5 * fry) / (sy * 2 ** 0.5)))))
-                                )
-            da_intensity = da_intensity.compute()
-            intensity = intensity + da_intensity
-            da_intensity = da.zeros((self.projection.yres, self.projection.xres), chunks=(1000, 1000))
-
-        # Average intensity field
-        intensity = intensity / len(xp)
-
-        # Normalize intensity field to rbg values
-        if np.max(intensity) != 0:
-            intensity = intensity / np.max(intensity) * 255
+        x, y = self._x_axis, self._y_axis
+
+        # one row per particle; (xp, yp, amp)
+        particles = da.from_array(np.column_stack((xp, yp, self._amplitude(dia_x, dia_y, z_physical)))
+                                  .astype(np.float64), chunks=(chunksize, 3))
+
+        def _block_intensity(_chunk):
+            # partial intensity field for a chunk of particles
+            _out = np.zeros((self.projection.yres, self.projection.xres), dtype=np.float32)
+            _xp, _yp, _amp = np.ascontiguousarray(_chunk.T)
+            _accumulate_intensity_block(x, y, _xp, _yp, _amp, float(sx), float(sy), float(frx), float(fry), _out)
+            return _out[None, ...]
+
+        intensity = particles.map_blocks(_block_intensity, drop_axis=1, new_axis=[1, 2],
+                                         chunks=((1,) * particles.numblocks[0],
+                                                 (self.projection.yres,), (self.projection.xres,)),
+                                         dtype=np.float32).sum(axis=0).compute()
+
+        # Normalize intensity field to rbg values; averaging over particles cancels out here
+        _max = np.max(intensity)
+        if _max != 0:
+            intensity *= 255 / _max
         print('Done computing intensity field')
 
         self.values = intensity
 
         return self.values
 
-    def compute_mpi(self):
+    def compute_mpi(self, chunksize=5096):
         """
         Ideal for computing intensity field for higher resolution images
         uses MPI for parallel computing
+        :param chunksize: int
+            Number of particles sent to setup at once on each process
         :return:
         """
         comm = MPI.COMM_WORLD
@@ -255,18 +409,14 @@ class Intensity:
         size = comm.Get_size()
         # set up the data
         (dia_x, dia_y, xp, yp, sx, sy, frx, fry, s, q, z_physical) = self.cache
-        intensity = np.zeros((self.projection.yres, self.projection.xres))
-        x = np.linspace(-self.projection.xres / 2, self.projection.xres / 2, self.projection.xres)
-        y = np.linspace(-self.projection.yres / 2, self.projection.yres / 2, self.projection.yres)
-        x, y = np.meshgrid(x, y)
+        # float32 is sufficient as the field is normalized to rgb values
+        intensity = np.zeros((self.projection.yres, self.projection.xres), dtype=np.float32)
+        x, y = self._x_axis, self._y_axis
 
         # laser sheet thickness
         ls_thickness = self.projection.particles.laser_sheet.thickness
         ls_position = self.projection.particles.laser_sheet.position
 
-        # store length of xp
-        _len = len(xp)
-
         # split the data
         xp = np.array_split(xp, size)[rank]
         yp = np.array_split(yp, size)[rank]
@@ -274,29 +424,27 @@ class Intensity:
         dia_y = np.array_split(dia_y, size)[rank]
         z_physical = np.array_split(z_physical, size)[rank]
 
-        for i in tqdm.tqdm(range(len(xp)), desc="Computing intensity field for particles on process " + str(rank)):
+        for i in tqdm.tqdm(range(0, len(xp), chunksize),
+                           desc="Computing intensity field for particles on process " + str(rank)):
+            j = i + chunksize
             intensity += self.setup(x, y, ls_thickness, ls_position,
-                                    dia_x[i], dia_y[i], xp[i], yp[i],
-                                    sx, sy, frx, fry, s, q, z_physical[i], i)
+                                    dia_x[i:j], dia_y[i:j], xp[i:j], yp[i:j],
+                                    sx, sy, frx, fry, s, q, z_physical[i:j], i)
 
-        # wait for all processes to finish
-        comm.Barrier()
         # sum up all the intensity fields from all the processes
+        # buffer based reduce; the float32 fields are not pickled
         if rank == 0:
-            for i in range(1, size):
-                intensity += comm.recv(source=i)
-
-            # Average intensity field -- use _len because xp is split
-            intensity = intensity / _len
+            comm.Reduce(MPI.IN_PLACE, intensity, op=MPI.SUM, root=0)
 
-            # Normalize intensity field to rbg values
-            if np.max(intensity) != 0:
-                intensity = intensity / np.max(intensity) * 255
+            # Normalize intensity field to rbg values; averaging over particles cancels out here
+            _max = np.max(intensity)
+            if _max != 0:
+                intensity *= 255 / _max
             print('Done computing intensity field')
 
             self.values = intensity
         else:
-            comm.send(intensity, dest=0)
+            comm.Reduce(intensity, None, op=MPI.SUM, root=0)
 
         self.values = comm.bcast(self.values, root=0)
 
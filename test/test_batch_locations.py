@@ -0,0 +1,66 @@
+import unittest
+import contextlib
+import io
+import numpy as np
+
+
+class TestBatchLocations(unittest.TestCase):
+    def test_batch_locations_curvilinear(self):
+        from sypivlib.function.dataio import GridIO, FlowIO
+        from sypivlib.sypiv.create_particles import Particle, LaserSheet, CreateParticles
+
+        # Synthetic single block grid with warped i-lines; cells are not parallelepipeds
+        ni, nj, nk = 16, 16, 16
+        x, y, z = np.meshgrid(np.linspace(0, 1, ni), np.linspace(0, 1, nj), np.linspace(0, 0.1, nk), indexing='ij')
+        x = x + 0.2 * np.sin(np.pi * y)
+        grid = GridIO('synthetic.x')
+        grid.nb = 1
+        grid.ni, grid.nj, grid.nk = np.array([ni]), np.array([nj]), np.array([nk])
+        grid.grd = np.stack((x, y, z), axis=-1)[..., None]
+        grid.grd_min = grid.grd.min(axis=(0, 1, 2)).T
+        grid.grd_max = grid.grd.max(axis=(0, 1, 2)).T
+
+        # Non-linear velocity field so that p-space and c-space interpolation differ
+        rho = 1 + 0.1 * x
+        flow = FlowIO('synthetic.q')
+        flow.nb = 1
+        flow.ni, flow.nj, flow.nk = grid.ni, grid.nj, grid.nk
+        flow.mach, flow.alpha, flow.rey, flow.time = 0.5, 0, 1e6, 0
+        flow.q = np.stack((rho, rho * (100 + 50 * np.sin(np.pi * y)), rho * 10 * np.sin(np.pi * x), 0.5 * rho,
+                           2.5e5 + 0 * x), axis=-1)[..., None]
+
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            grid.compute_metrics()
+
+            p = Particle()
+            p.rng = np.random.default_rng(0)
+            p.min_dia = 144e-9  # m
+            p.max_dia = 573e-9  # m
+            p.mean_dia = 281e-9  # m
+            p.std_dia = 97e-9  # m
+            p.density = 810  # kg/m3
+            p.n_concentration = 50
+            p.compute_distribution()
+
+            laser = LaserSheet(grid)
+            laser.position = 0.05  # in m
+            laser.thickness = 4e-3  # in m
+            laser.pulse_time = 2e-3  # long enough for particles to cross several cells
+            laser.compute_bounds()
+
+            batch, serial = [CreateParticles(grid, flow, p, laser, [None, None, None, None]) for _ in range(2)]
+            for loc in (batch, serial):
+                loc.rng = np.random.default_rng(1)
+                loc.ia_bounds = [0.3, 0.5, 0.3, 0.5]
+                loc.in_plane = 70
+                loc.compute_locations()
+            batch.compute_locations2()
+            serial.compute_locations2_serial()
+
+        # Batch search and p-space interpolation give the same locations as the per-particle path
+        self.assertGreater(np.abs(batch.locations2 - batch.locations).max(), 0.1)
+        np.testing.assert_allclose(batch.locations2, serial.locations2, rtol=0, atol=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()
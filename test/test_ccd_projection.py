@@ -1,12 +1,15 @@
 import unittest
+import os
 import matplotlib.pyplot as plt
 
 
 class TestCCDProjection(unittest.TestCase):
+    # Needs the case files from the data directory; paths are relative to the test directory
+    @unittest.skipUnless(os.path.exists('../data/plate_data/plate.sp.x'), 'case data not found')
     def test_ccd_projection(self):
-        from src.sypivlib.function.dataio import GridIO, FlowIO
-        from src.sypivlib.sypiv.create_particles import Particle, LaserSheet, CreateParticles
-        from src.sypivlib.sypiv.ccd_projection import CCDProjection
+        from sypivlib.function.dataio import GridIO, FlowIO
+        from sypivlib.sypiv.create_particles import Particle, LaserSheet, CreateParticles
+        from sypivlib.sypiv.ccd_projection import CCDProjection
 
         # Read-in the grid and flow file
         grid = GridIO('../data/plate_data/plate.sp.x')
@@ -51,17 +54,15 @@ class TestCCDProjection(unittest.TestCase):
         # Sample code to plot particle locations and relative diameters
         _in_plane = int(p.n_concentration * loc.in_plane * 0.01)
         # plot in-plane particle locations
-        plt.scatter(proj.projections[:_in_plane, 0], proj.projections[:_in_plane, 1], c='g', s=5)
+        plt.scatter(proj.proj_x[:_in_plane], proj.proj_y[:_in_plane], c='g', s=5)
         # plot out-of-plane locations
-        plt.scatter(proj.projections[_in_plane:, 0], proj.projections[_in_plane:, 1], c='r', s=5)
+        plt.scatter(proj.proj_x[_in_plane:], proj.proj_y[_in_plane:], c='r', s=5)
 
         plt.figure()
         # plot in-plane particle locations
-        plt.scatter(proj.projections2[:_in_plane, 0], proj.projections2[:_in_plane, 1], c='g', s=5)
+        plt.scatter(proj.proj2_x[:_in_plane], proj.proj2_y[:_in_plane], c='g', s=5)
         # plot out-of-plane locations
-        plt.scatter(proj.projections2[_in_plane:, 0], proj.projections2[_in_plane:, 1], c='r', s=5)
-
-        plt.show()
+        plt.scatter(proj.proj2_x[_in_plane:], proj.proj2_y[_in_plane:], c='r', s=5)
 
 
 if __name__ == '__main__':
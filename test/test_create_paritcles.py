@@ -1,11 +1,14 @@
 import unittest
+import os
 import matplotlib.pyplot as plt
 
 
 class TestCreateParticles(unittest.TestCase):
+    # Needs the case files from the data directory; paths are relative to the test directory
+    @unittest.skipUnless(os.path.exists('../data/shocks/shock_test.sb.sp.x'), 'case data not found')
     def test_create_particles(self):
-        from src.sypivlib.function.dataio import GridIO, FlowIO
-        from src.sypivlib.sypiv.create_particles import Particle, LaserSheet, CreateParticles
+        from sypivlib.function.dataio import GridIO, FlowIO
+        from sypivlib.sypiv.create_particles import Particle, LaserSheet, CreateParticles
 
         # Read-in the grid and flow file
         grid = GridIO('../data/shocks/shock_test.sb.sp.x')
@@ -44,11 +47,11 @@ class TestCreateParticles(unittest.TestCase):
         # Sample code to plot particle locations and relative diameters
         _in_plane = int(p.n_concentration * loc.in_plane * 0.01)
         # plot in-plane particle locations
-        plt.scatter(loc.locations[:_in_plane, 0], loc.locations[:_in_plane, 1],
-                    s=10*loc.locations[:_in_plane, 3]/p.min_dia, c='g')
+        plt.scatter(loc.loc_x[:_in_plane], loc.loc_y[:_in_plane],
+                    s=10*loc.loc_d[:_in_plane]/p.min_dia, c='g')
         # plot out-of-plane locations
-        plt.scatter(loc.locations[_in_plane:, 0], loc.locations[_in_plane:, 1],
-                    s=10*loc.locations[_in_plane:, 3]/p.min_dia, c='r')
+        plt.scatter(loc.loc_x[_in_plane:], loc.loc_y[_in_plane:],
+                    s=10*loc.loc_d[_in_plane:]/p.min_dia, c='r')
         plt.xlim([-0.0001, 0.004])
         plt.ylim([0, 0.0019])
         plt.title('Particles created on the given IA for the first snap')
@@ -57,17 +60,15 @@ class TestCreateParticles(unittest.TestCase):
 
         # plot in-plane particle locations
         plt.figure()
-        plt.scatter(loc.locations2[:_in_plane, 0], loc.locations2[:_in_plane, 1],
-                    s=10 * loc.locations2[:_in_plane, 3] / p.min_dia, c='g')
+        plt.scatter(loc.loc2_x[:_in_plane], loc.loc2_y[:_in_plane],
+                    s=10 * loc.loc2_d[:_in_plane] / p.min_dia, c='g')
         # plot out-of-plane locations
-        plt.scatter(loc.locations2[_in_plane:, 0], loc.locations2[_in_plane:, 1],
-                    s=10 * loc.locations2[_in_plane:, 3] / p.min_dia, c='r')
+        plt.scatter(loc.loc2_x[_in_plane:], loc.loc2_y[_in_plane:],
+                    s=10 * loc.loc2_d[_in_plane:] / p.min_dia, c='r')
         plt.xlim([-0.0001, 0.004])
         plt.ylim([0, 0.0019])
         plt.title('Particles created on the given IA for the second snap')
 
-        plt.show()
-
 
 if __name__ == '__main__':
     unittest.main()
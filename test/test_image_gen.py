@@ -1,14 +1,17 @@
 import unittest
+import os
 import numpy as np
 
 
 class TestImageGen(unittest.TestCase):
+    # Needs the case files from the data directory; paths are relative to the test directory
+    @unittest.skipUnless(os.path.exists('../data/shocks/interpolated_data/mgrd_to_p3d.x'), 'case data not found')
     def test_image_gen(self):
-        from src.sypivlib.function.dataio import GridIO, FlowIO
-        from src.sypivlib.sypiv.create_particles import Particle, LaserSheet, CreateParticles
-        from src.sypivlib.sypiv.ccd_projection import CCDProjection
-        from src.sypivlib.sypiv.intensity import Intensity
-        from src.sypivlib.sypiv.image_gen import ImageGen
+        from sypivlib.function.dataio import GridIO, FlowIO
+        from sypivlib.sypiv.create_particles import Particle, LaserSheet, CreateParticles
+        from sypivlib.sypiv.ccd_projection import CCDProjection
+        from sypivlib.sypiv.intensity import Intensity
+        from sypivlib.sypiv.image_gen import ImageGen
 
         # Read-in the grid and flow file
         grid = GridIO('../data/shocks/interpolated_data/mgrd_to_p3d.x')
@@ -65,10 +68,10 @@ class TestImageGen(unittest.TestCase):
             proj.compute()
 
             # (radiusx, radiusy, xp, yp, sx, sy, frx, fry, s, q, z_physical)
-            cache = (proj.projections[:, 2], proj.projections[:, 2],
-                     proj.projections[:, 0], proj.projections[:, 1],
+            cache = (proj.proj_d, proj.proj_d,
+                     proj.proj_x, proj.proj_y,
                      2.0, 2.0, 1.0, 1.0,
-                     2, 1, loc.locations[:, 2])  # 2 is gaussian profile, 1 is reflectivity factor, z_physical
+                     2, 1, loc.loc_z)  # 2 is gaussian profile, 1 is reflectivity factor, z_physical
             intensity = Intensity(cache, proj)
             intensity.compute()
 
@@ -78,10 +81,10 @@ class TestImageGen(unittest.TestCase):
             snap.check_data(snap_num=1)
             print('Done with image 1 for pair number ' + str(i) + '\n')
 
-            cache2 = (proj.projections2[:, 2], proj.projections2[:, 2],
-                     proj.projections2[:, 0], proj.projections2[:, 1],
+            cache2 = (proj.proj2_d, proj.proj2_d,
+                     proj.proj2_x, proj.proj2_y,
                      2.0, 2.0, 1.0, 1.0,
-                     2, 1, loc.locations2[:, 2])
+                     2, 1, loc.loc2_z)
             intensity2 = Intensity(cache2, proj)
             intensity2.compute()
             #
@@ -1,14 +1,17 @@
 import unittest
+import os
 import matplotlib.pyplot as plt
 import numpy as np
 
 
 class TestIntensity(unittest.TestCase):
+    # Needs the case files from the data directory; paths are relative to the test directory
+    @unittest.skipUnless(os.path.exists('../data/plate_data/plate.sp.x'), 'case data not found')
     def test_intensity(self):
-        from src.sypivlib.function.dataio import GridIO, FlowIO
-        from src.sypivlib.sypiv.create_particles import Particle, LaserSheet, CreateParticles
-        from src.sypivlib.sypiv.ccd_projection import CCDProjection
-        from src.sypivlib.sypiv.intensity import Intensity
+        from sypivlib.function.dataio import GridIO, FlowIO
+        from sypivlib.sypiv.create_particles import Particle, LaserSheet, CreateParticles
+        from sypivlib.sypiv.ccd_projection import CCDProjection
+        from sypivlib.sypiv.intensity import Intensity
 
         # Read-in the grid and flow file
         grid = GridIO('../data/plate_data/plate.sp.x')
@@ -45,11 +48,11 @@ class TestIntensity(unittest.TestCase):
         # Sample code to plot particle locations and relative diameters
         _in_plane = int(p.n_concentration * loc.in_plane * 0.01)
         # plot in-plane particle locations
-        plt.scatter(loc.locations[:_in_plane, 0], loc.locations[:_in_plane, 1],
-                    s=10 * loc.locations[:_in_plane, 3] / p.min_dia, c='g')
+        plt.scatter(loc.loc_x[:_in_plane], loc.loc_y[:_in_plane],
+                    s=10 * loc.loc_d[:_in_plane] / p.min_dia, c='g')
         # plot out-of-plane locations
-        plt.scatter(loc.locations[_in_plane:, 0], loc.locations[_in_plane:, 1],
-                    s=10 * loc.locations[_in_plane:, 3] / p.min_dia, c='r')
+        plt.scatter(loc.loc_x[_in_plane:], loc.loc_y[_in_plane:],
+                    s=10 * loc.loc_d[_in_plane:] / p.min_dia, c='r')
 
         # Create particle projections (Simulating data from EUROPIV)
         proj = CCDProjection(loc)
@@ -62,21 +65,21 @@ class TestIntensity(unittest.TestCase):
         _in_plane = int(p.n_concentration * loc.in_plane * 0.01)
         # plot in-plane particle locations
         plt.figure()
-        plt.scatter(proj.projections[:_in_plane, 0], proj.projections[:_in_plane, 1], c='g',
-                    s=10 * proj.projections[:_in_plane, 2] / p.min_dia)
+        plt.scatter(proj.proj_x[:_in_plane], proj.proj_y[:_in_plane], c='g',
+                    s=10 * proj.proj_d[:_in_plane] / p.min_dia)
         # plot out-of-plane locations
-        plt.scatter(proj.projections[_in_plane:, 0], proj.projections[_in_plane:, 1], c='r',
-                    s=10 * proj.projections[_in_plane:, 2] / p.min_dia)
+        plt.scatter(proj.proj_x[_in_plane:], proj.proj_y[_in_plane:], c='r',
+                    s=10 * proj.proj_d[_in_plane:] / p.min_dia)
         plt.title('Projected data - Not scaled')
-        cache = (proj.projections[:, 2], proj.projections[:, 2],
-                 proj.projections[:, 0], proj.projections[:, 1],
+        cache = (proj.proj_d, proj.proj_d,
+                 proj.proj_x, proj.proj_y,
                  0.5, 0.5, 1.0, 1.0,
-                 2, 1, loc.locations[:, 2])
+                 2, 1, loc.loc_z)
         intensity = Intensity(cache, proj)
         intensity.compute_serial()
 
         # Creating temp arrays to test. This will be done internally in the code of image_gen
-        xp, yp = proj.projections[:, 0], proj.projections[:, 1]
+        xp, yp = proj.proj_x, proj.proj_y
         x = np.linspace(-proj.xres / 2, proj.xres / 2, proj.xres)
         y = np.linspace(-proj.yres / 2, proj.yres / 2, proj.yres)
         xsize = proj.xres / proj.dpi
@@ -95,7 +98,6 @@ class TestIntensity(unittest.TestCase):
         fig = plt.figure(figsize=[xsize, ysize], dpi=proj.dpi)
         ax = plt.axes([0.0, 0.0, 1.0, 1.0])
         ax.imshow(intensity.values, cmap='gray', origin='lower')
-        plt.show()
 
 
 if __name__ == '__main__':
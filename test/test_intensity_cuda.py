@@ -0,0 +1,44 @@
+import unittest
+import os
+import subprocess
+import sys
+
+# The CUDA simulator has to be enabled before numba is imported, so the comparison runs in its own interpreter
+_SCRIPT = """
+import contextlib
+import io
+from types import SimpleNamespace
+import numpy as np
+from sypivlib.sypiv.intensity import Intensity
+
+rng = np.random.default_rng(0)
+n = 40
+laser_sheet = SimpleNamespace(thickness=4e-3, position=0.05)
+projection = SimpleNamespace(xres=24, yres=16, particles=SimpleNamespace(laser_sheet=laser_sheet))
+# (radiusx, radiusy, xp, yp, sx, sy, frx, fry, s, q, z_physical)
+cache = (rng.uniform(1, 3, n), rng.uniform(1, 3, n), rng.uniform(-12, 12, n), rng.uniform(-8, 8, n),
+         1.5, 1.5, 1.0, 1.0, 2, 1, 0.05 + rng.uniform(-2e-3, 2e-3, n))
+with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+    values = Intensity(cache, projection).compute_cuda(threads=(4, 4))
+    reference = Intensity(cache, projection).compute_serial()
+print(values.dtype, np.abs(values - reference).max())
+"""
+
+
+class TestIntensityCuda(unittest.TestCase):
+    def test_compute_cuda_simulator(self):
+        _root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        _path = os.pathsep.join(filter(None, (os.path.join(_root, 'src'), os.environ.get('PYTHONPATH'))))
+        _env = dict(os.environ, NUMBA_ENABLE_CUDASIM='1', PYTHONPATH=_path)
+        _out = subprocess.run([sys.executable, '-c', _SCRIPT], cwd=_root, env=_env,
+                              capture_output=True, text=True, timeout=600)
+        self.assertEqual(_out.returncode, 0, _out.stderr)
+
+        # float32 image from the kernel; same as the reference up to rounding
+        _dtype, _diff = _out.stdout.split()
+        self.assertEqual(_dtype, 'float32')
+        self.assertLess(float(_diff), 1e-2)
+
+
+if __name__ == '__main__':
+    unittest.main()
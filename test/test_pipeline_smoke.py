@@ -0,0 +1,84 @@
+import unittest
+import contextlib
+import io
+import numpy as np
+
+
+class TestPipelineSmoke(unittest.TestCase):
+    def test_pipeline_smoke(self):
+        from sypivlib.function.dataio import GridIO, FlowIO
+        from sypivlib.sypiv.create_particles import Particle, LaserSheet, CreateParticles
+        from sypivlib.sypiv.ccd_projection import CCDProjection
+        from sypivlib.sypiv.intensity import Intensity
+
+        # Synthetic single block grid and flow built in memory; no data files needed
+        ni, nj, nk = 16, 16, 16
+        x, y, z = np.meshgrid(np.linspace(0, 1, ni), np.linspace(0, 1, nj), np.linspace(0, 0.1, nk), indexing='ij')
+        grid = GridIO('synthetic.x')
+        grid.nb = 1
+        grid.ni, grid.nj, grid.nk = np.array([ni]), np.array([nj]), np.array([nk])
+        grid.grd = np.stack((x, y, z), axis=-1)[..., None]
+        grid.grd_min = grid.grd.min(axis=(0, 1, 2)).T
+        grid.grd_max = grid.grd.max(axis=(0, 1, 2)).T
+        grid.compute_metrics()
+
+        # Uniform density with a sheared x-velocity
+        rho = 1 + 0.1 * x
+        flow = FlowIO('synthetic.q')
+        flow.nb = 1
+        flow.ni, flow.nj, flow.nk = grid.ni, grid.nj, grid.nk
+        flow.mach, flow.alpha, flow.rey, flow.time = 0.5, 0, 1e6, 0
+        flow.q = np.stack((rho, rho * (100 + 50 * y), rho * 10 * x, 0.5 * rho, 2.5e5 + 0 * x), axis=-1)[..., None]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Set particle data
+            p = Particle()
+            p.rng = np.random.default_rng(0)
+            p.min_dia = 144e-9  # m
+            p.max_dia = 573e-9  # m
+            p.mean_dia = 281e-9  # m
+            p.std_dia = 97e-9  # m
+            p.density = 810  # kg/m3
+            p.n_concentration = 100
+            p.compute_distribution()
+
+            laser = LaserSheet(grid)
+            laser.position = 0.05  # in m
+            laser.thickness = 4e-3  # in m
+            laser.pulse_time = 1e-5
+            laser.compute_bounds()
+
+            loc = CreateParticles(grid, flow, p, laser, [None, None, None, None])
+            loc.rng = np.random.default_rng(1)
+            loc.ia_bounds = [0.3, 0.5, 0.3, 0.5]
+            loc.in_plane = 70
+            loc.compute_locations()
+            loc.compute_locations2()
+
+            proj = CCDProjection(loc, xres=32, yres=32, dpi=72)
+            # Set distance based on similar triangles relationship; the IA fills the CCD
+            proj.d_ccd = proj.xres * 25.4e-3 / proj.dpi  # in m
+            proj.d_ia = 0.2  # in m; ia_bounds (max - min)
+            proj.compute()
+
+            # (radiusx, radiusy, xp, yp, sx, sy, frx, fry, s, q, z_physical)
+            cache = (proj.proj_d, proj.proj_d, proj.proj_x, proj.proj_y,
+                     2.0, 2.0, 1.0, 1.0, 2, 1, loc.loc_z)
+            intensity = Intensity(cache, proj)
+            intensity.compute()
+            reference = Intensity(cache, proj).compute_serial()
+
+        # Every particle should move with the flow between the snaps
+        self.assertEqual(loc.locations2.shape, loc.locations.shape)
+        self.assertTrue(np.all(loc.loc2_x > loc.loc_x))
+
+        # Images are normalized to rgb range
+        self.assertEqual(intensity.values.shape, (32, 32))
+        self.assertTrue(np.all(np.isfinite(intensity.values)))
+        self.assertAlmostEqual(float(intensity.values.max()), 255, places=3)
+        # The fused kernel accumulates in float32; same image as the reference up to rounding
+        self.assertLess(np.abs(intensity.values - reference).max(), 1e-2)
+
+
+if __name__ == '__main__':
+    unittest.main()